@@ -1,12 +1,14 @@
 from typing import List
 from functools import lru_cache
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class DatabaseSettings(BaseModel):
     """Database related configuration"""
 
+    model_config = ConfigDict(frozen=True)
+
     host: str = "localhost"
     port: int = 5432
     name: str = "mydatabase"
@@ -25,6 +27,8 @@ class DatabaseSettings(BaseModel):
 class FileSettings(BaseModel):
     """File upload related configuration"""
 
+    model_config = ConfigDict(frozen=True)
+
     allowed_file_types: List[str] = Field(
         default_factory=lambda: ["text/csv", "application/vnd.ms-excel"]
     )
@@ -38,6 +42,8 @@ class FileSettings(BaseModel):
 class APISettings(BaseModel):
     """API related configuration"""
 
+    model_config = ConfigDict(frozen=True)
+
     title: str = "My FastAPI Application"
     version: str = "1.0.0"
     description: str = ""
@@ -47,12 +53,18 @@ class APISettings(BaseModel):
 class AISettings(BaseModel):
     """AI Provider configuration"""
 
+    model_config = ConfigDict(frozen=True)
+
     groq_api_key: str = ""
 
 
 class RedisSettings(BaseModel):
     """Redis-backed status tracker configuration"""
 
+    model_config = ConfigDict(frozen=True)
+
+    # Disable to fall back to an in-process job store (single-worker local dev only).
+    enabled: bool = True
     url: str = "redis://localhost:6379/0"
     job_key_prefix: str = "datatalk:job:"
     job_ttl_seconds: int = 24 * 60 * 60
@@ -75,6 +87,7 @@ class AppSettings(BaseSettings):
 
     # Pydantic settings configuration
     model_config = SettingsConfigDict(
+        frozen=True,
         env_file=".env",
         env_file_encoding="utf-8",
         env_nested_delimiter="__",
@@ -4,6 +4,12 @@ import warnings
 from typing import Dict, Any, List
 import json
 
+try:
+    import polars as pl
+except ImportError:
+    # Polars is an optional accelerator; the pandas path below stays the fallback.
+    pl = None
+
 class DataProcessor:
     """Handle CSV data processing and profiling"""
     
@@ -11,21 +17,41 @@ class DataProcessor:
         """
         Clean the uploaded CSV data
         """
+        # Prefer the multithreaded polars engine when it is installed; frames it
+        # cannot represent (e.g. mixed-type object columns) fall back to pandas.
+        if pl is not None:
+            try:
+                return self._clean_data_polars(df)
+            except Exception:
+                pass
+
         # Make a copy
         cleaned_df = df.copy()
 
         # Normalize object/string columns by trimming and converting blank strings to missing values.
+        # The vectorized .str accessor runs in C per column; non-string objects come back as
+        # missing from .str.strip(), so restore the original values in those slots.
         text_columns = cleaned_df.select_dtypes(include=["object", "string"]).columns
-        for col in text_columns:
-            cleaned_df[col] = cleaned_df[col].apply(
-                lambda value: value.strip() if isinstance(value, str) else value
-            )
-            cleaned_df[col] = cleaned_df[col].replace(r"^\s*$", pd.NA, regex=True)
+        if len(text_columns) > 0:
+            stripped = cleaned_df[text_columns].apply(lambda col: col.str.strip())
+            cleaned_df[text_columns] = stripped.where(stripped.notna(), cleaned_df[text_columns])
+            cleaned_df[text_columns] = cleaned_df[text_columns].replace(r"^\s*$", pd.NA, regex=True)
 
-        # Remove exact duplicate rows.
-        cleaned_df = cleaned_df.drop_duplicates()
+        # Remove exact duplicate rows. Text columns are factorized to integer
+        # codes first so row hashing compares ints instead of Python strings;
+        # factorize maps all missing values to -1, matching drop_duplicates'
+        # NaN-equality semantics.
+        if len(text_columns) > 0 and len(cleaned_df) > 0:
+            key_frame = cleaned_df.copy(deep=False)
+            for col in text_columns:
+                key_frame[col] = pd.factorize(cleaned_df[col], use_na_sentinel=True)[0]
+            cleaned_df = cleaned_df[~key_frame.duplicated()]
+        else:
+            cleaned_df = cleaned_df.drop_duplicates()
 
         # Convert object/string columns that are fully parseable into datetime.
+        # Sniff a small sample first so obviously non-date columns skip the full parse,
+        # then coerce the whole column in one vectorized call.
         for col in cleaned_df.select_dtypes(include=["object", "string"]).columns:
             non_null_values = cleaned_df[col].dropna()
             if non_null_values.empty:
@@ -33,11 +59,11 @@ class DataProcessor:
             try:
                 with warnings.catch_warnings():
                     warnings.simplefilter("ignore", UserWarning)
-                    pd.to_datetime(non_null_values, errors="raise")
-                    cleaned_df[col] = pd.to_datetime(cleaned_df[col], errors="coerce")
+                    pd.to_datetime(non_null_values.head(100), errors="raise", format="mixed", cache=True)
             except (ValueError, TypeError, OverflowError):
                 # Gracefully keep the original column when parsing is not reliable.
                 continue
+            cleaned_df[col] = pd.to_datetime(cleaned_df[col], errors="coerce", format="mixed", cache=True)
 
         # Drop columns where more than 90% of values are null.
         null_ratio = cleaned_df.isna().mean()
@@ -56,69 +82,192 @@ class DataProcessor:
         categorical_columns = cleaned_df.select_dtypes(include=["object", "category", "string"]).columns
         for col in categorical_columns:
             cleaned_df[col] = cleaned_df[col].fillna("Unknown")
-        
+
+        # Cast low-cardinality text columns to category: parquet dictionary-
+        # encodes them (smaller files, faster reloads) and later value_counts/
+        # nunique/dedup work on integer codes instead of Python strings.
+        if len(cleaned_df) > 0:
+            for col in cleaned_df.select_dtypes(include=["object", "string"]).columns:
+                if cleaned_df[col].nunique() / len(cleaned_df) < 0.5:
+                    cleaned_df[col] = cleaned_df[col].astype("category")
+
         return cleaned_df
-    
+
+    def _clean_data_polars(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Polars implementation of clean_data: same steps, executed on a
+        multithreaded Arrow-native engine.
+        """
+        cleaned = pl.from_pandas(df)
+
+        # Trim string columns and convert blank strings to missing values.
+        string_columns = [col for col, dtype in cleaned.schema.items() if dtype == pl.String]
+        if string_columns:
+            cleaned = cleaned.with_columns(
+                pl.col(string_columns).str.strip_chars().replace("", None)
+            )
+
+        # Remove exact duplicate rows.
+        cleaned = cleaned.unique(keep="first", maintain_order=True)
+
+        # Convert string columns that are fully parseable into datetime,
+        # sniffing a small sample first to skip obviously non-date columns.
+        for col in string_columns:
+            non_null_values = cleaned.get_column(col).drop_nulls()
+            if non_null_values.is_empty():
+                continue
+            try:
+                sample = non_null_values.head(100).str.to_datetime(strict=False)
+            except pl.exceptions.ComputeError:
+                # No datetime format could be inferred; keep the column as-is.
+                continue
+            if sample.null_count() == 0:
+                cleaned = cleaned.with_columns(pl.col(col).str.to_datetime(strict=False))
+
+        # Drop columns where more than 90% of values are null.
+        if cleaned.height > 0:
+            null_ratios = cleaned.null_count().row(0)
+            high_null_columns = [
+                col for col, nulls in zip(cleaned.columns, null_ratios)
+                if nulls / cleaned.height > 0.90
+            ]
+            if high_null_columns:
+                cleaned = cleaned.drop(high_null_columns)
+
+        # Impute missing numeric values using median per column. Only touch
+        # columns that actually contain nulls so integer columns without
+        # missing values are not upcast to float by the median expression.
+        numeric_columns = [col for col, dtype in cleaned.schema.items() if dtype.is_numeric()]
+        if numeric_columns:
+            numeric_null_counts = cleaned.select(pl.col(numeric_columns).null_count()).row(0)
+            columns_with_nulls = [
+                col for col, nulls in zip(numeric_columns, numeric_null_counts) if nulls > 0
+            ]
+            if columns_with_nulls:
+                cleaned = cleaned.with_columns(
+                    pl.col(col).fill_null(pl.col(col).median()) for col in columns_with_nulls
+                )
+
+        # Fill missing string values with "Unknown".
+        remaining_strings = [col for col, dtype in cleaned.schema.items() if dtype == pl.String]
+        if remaining_strings:
+            cleaned = cleaned.with_columns(pl.col(remaining_strings).fill_null("Unknown"))
+
+        # Cast low-cardinality string columns to categorical, mirroring the
+        # pandas path, so parquet output is dictionary-encoded.
+        if remaining_strings and cleaned.height > 0:
+            unique_counts = cleaned.select(pl.col(remaining_strings).n_unique()).row(0)
+            low_cardinality = [
+                col for col, n_unique in zip(remaining_strings, unique_counts)
+                if n_unique / cleaned.height < 0.5
+            ]
+            if low_cardinality:
+                cleaned = cleaned.with_columns(pl.col(low_cardinality).cast(pl.Categorical))
+
+        return cleaned.to_pandas()
+
+    _MEMORY_SAMPLE_ROWS = 10_000
+
+    def _estimate_memory_usage(self, df: pd.DataFrame) -> int:
+        """
+        Estimate frame memory usage. memory_usage(deep=True) walks every
+        Python string in object columns, so for large frames the exact scan
+        is replaced by a deep measurement of a sample scaled to full size.
+        """
+        if len(df) <= self._MEMORY_SAMPLE_ROWS:
+            return int(df.memory_usage(deep=True).sum())
+
+        # Measure the index exactly (cheap) and scale only the column data;
+        # the sampled index materializes differently from e.g. a RangeIndex.
+        sample = df.sample(self._MEMORY_SAMPLE_ROWS)
+        column_bytes = sample.memory_usage(index=False, deep=True).sum()
+        return int(column_bytes * (len(df) / len(sample)) + df.index.memory_usage())
+
     def generate_profile(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
         Generate comprehensive data profile
         """
+        row_count = int(len(df))
+
+        # Precompute whole-frame aggregates once instead of rescanning every column
+        # for each metric. Each of these is a single pass across all columns.
+        null_counts = df.isnull().sum().to_dict()
+        unique_counts = df.nunique().to_dict()
+        dtypes = df.dtypes.astype(str).to_dict()
+        # Bool columns count as numeric (pyarrow CSV ingest infers them
+        # routinely), but describe() would profile them as categories, so
+        # they are cast to 0/1 for the stats pass.
+        numeric_columns = df.select_dtypes(include=[np.number, "bool"]).columns
+        bool_columns = df.select_dtypes(include=["bool"]).columns
+        numeric_stats = (
+            df[numeric_columns]
+            .astype({col: "uint8" for col in bool_columns})
+            .describe(percentiles=[0.25, 0.50, 0.75])
+            .to_dict()
+            if len(numeric_columns) > 0
+            else {}
+        )
+
         # FIX 1: Wrap numpy sums in int()
         profile = {
             "summary": {
-                "total_rows": int(len(df)),
+                "total_rows": row_count,
                 "total_columns": int(len(df.columns)),
-                "memory_usage": int(df.memory_usage(deep=True).sum()),
+                "memory_usage": self._estimate_memory_usage(df),
                 "duplicate_rows": int(df.duplicated().sum())
             },
             "columns": {},
             "missing_values": {},
             "statistics": {}
         }
-        
+
         for column in df.columns:
             col_data = df[column]
-            dtype = str(col_data.dtype)
-            
-            # FIX 2: Wrap isnull().sum() and nunique() in int()
+            # Series.to_dict already boxes values to native Python scalars in
+            # one C-level pass, so no per-scalar int()/float() calls are needed.
+            missing = null_counts[column]
+            all_null = missing >= row_count
+
             column_info = {
-                "dtype": dtype,
-                "total": int(len(col_data)),
-                "missing": int(col_data.isnull().sum()),
-                "missing_percentage": round((float(col_data.isnull().sum()) / len(col_data)) * 100, 2),
-                "unique": int(col_data.nunique())
+                "dtype": dtypes[column],
+                "total": row_count,
+                "missing": missing,
+                "missing_percentage": round((missing / row_count) * 100, 2),
+                "unique": unique_counts[column]
             }
-            
+
             # Numerical columns
-            if pd.api.types.is_numeric_dtype(col_data):
+            if column in numeric_stats:
+                stats = numeric_stats[column]
                 column_info.update({
-                    "mean": float(col_data.mean()) if not col_data.isnull().all() else None,
-                    "std": float(col_data.std()) if not col_data.isnull().all() else None,
-                    "min": float(col_data.min()) if not col_data.isnull().all() else None,
-                    "max": float(col_data.max()) if not col_data.isnull().all() else None,
+                    "mean": stats["mean"] if not all_null else None,
+                    "std": stats["std"] if not all_null else None,
+                    "min": stats["min"] if not all_null else None,
+                    "max": stats["max"] if not all_null else None,
                     "percentiles": {
-                        "25": float(col_data.quantile(0.25)) if not col_data.isnull().all() else None,
-                        "50": float(col_data.quantile(0.50)) if not col_data.isnull().all() else None,
-                        "75": float(col_data.quantile(0.75)) if not col_data.isnull().all() else None
+                        "25": stats["25%"] if not all_null else None,
+                        "50": stats["50%"] if not all_null else None,
+                        "75": stats["75%"] if not all_null else None
                     }
                 })
-            
+
             # Categorical/string columns
-            elif pd.api.types.is_string_dtype(col_data) or pd.api.types.is_categorical_dtype(col_data):
+            elif pd.api.types.is_string_dtype(col_data) or isinstance(col_data.dtype, pd.CategoricalDtype):
                 top_values = col_data.value_counts().head(5).to_dict()
                 column_info.update({
-                    # FIX 3: Ensure keys and values are standard types
-                    "top_values": {str(k): int(v) for k, v in top_values.items()}
+                    # Keys may be non-string (e.g. mixed object columns); keep
+                    # them JSON-safe.
+                    "top_values": {str(k): v for k, v in top_values.items()}
                 })
-            
+
             # Datetime columns
             elif pd.api.types.is_datetime64_any_dtype(col_data):
                 column_info.update({
-                    "min_date": col_data.min().isoformat() if not col_data.isnull().all() else None,
-                    "max_date": col_data.max().isoformat() if not col_data.isnull().all() else None
+                    "min_date": col_data.min().isoformat() if not all_null else None,
+                    "max_date": col_data.max().isoformat() if not all_null else None
                 })
-            
+
             profile["columns"][column] = column_info
             profile["missing_values"][column] = column_info["missing"]
-        
+
         return profile
@@ -1,6 +1,7 @@
-from typing import Dict, Any, Optional, List
+import asyncio
+from typing import AsyncIterator, Dict, Any, Optional, List
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel, Field
 from fastapi import HTTPException
 from redis.asyncio import Redis
@@ -21,8 +22,8 @@ class JobData(BaseModel):
     status: JobStatus = JobStatus.PENDING
     progress: int = 0  # 0 to 100 percentage
     message: str = "Initialized"
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     result: Optional[Dict[str, Any]] = None  # To store final data/profile
     error: Optional[str] = None
 
@@ -31,10 +32,48 @@ class StatusTracker:
     
     def __init__(self):
         self._redis: Redis | None = None
+        # In-process fallback store used when settings.redis.enabled is False.
+        # Only suitable for single-worker local development.
+        self._jobs: Dict[str, JobData] = {}
+        # Per-job locks so read-modify-write updates of one job do not
+        # serialize (or interleave with) updates of unrelated jobs.
+        # Reads stay lock-free.
+        self._job_locks: Dict[str, asyncio.Lock] = {}
+        self._creates_since_eviction = 0
+        # SSE subscribers for the in-process fallback store; the Redis
+        # backend uses pub/sub channels instead.
+        self._local_subscribers: Dict[str, List[asyncio.Queue]] = {}
+        # Generated-code cache for the fallback store (Redis keys are used
+        # when enabled); bounded, see set_cached_code.
+        self._code_cache: Dict[str, str] = {}
+
+    _MAX_JOB_LOCKS = 1024
+    _EVICTION_INTERVAL = 100
+    _MAX_CACHED_CODE = 256
+
+    def _evict_stale_jobs(self) -> None:
+        """Drop fallback-store jobs past their TTL (Redis handles this natively)."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.redis.job_ttl_seconds)
+        stale_ids = [job_id for job_id, job in self._jobs.items() if job.updated_at < cutoff]
+        for job_id in stale_ids:
+            del self._jobs[job_id]
+
+    def _job_lock(self, job_id: str) -> asyncio.Lock:
+        lock = self._job_locks.get(job_id)
+        if lock is None:
+            # Opportunistically drop idle locks so the dict stays bounded.
+            if len(self._job_locks) >= self._MAX_JOB_LOCKS:
+                for key in [k for k, l in self._job_locks.items() if not l.locked()]:
+                    del self._job_locks[key]
+            lock = self._job_locks.setdefault(job_id, asyncio.Lock())
+        return lock
 
     def _key(self, job_id: str) -> str:
         return f"{settings.redis.job_key_prefix}{job_id}"
 
+    def _event_channel(self, job_id: str) -> str:
+        return f"{settings.redis.job_key_prefix}events:{job_id}"
+
     def _get_client(self) -> Redis:
         if self._redis is None:
             self._redis = Redis.from_url(
@@ -52,17 +91,38 @@ class StatusTracker:
             detail="Status store unavailable. Please try again shortly.",
         )
 
+    def _notify_local_subscribers(self, job: JobData) -> None:
+        queues = self._local_subscribers.get(job.job_id)
+        if not queues:
+            return
+        payload = job.model_dump_json()
+        for queue in queues:
+            queue.put_nowait(payload)
+
     async def _write_job(self, job: JobData) -> None:
+        if not settings.redis.enabled:
+            self._jobs[job.job_id] = job.model_copy(deep=True)
+            self._notify_local_subscribers(job)
+            return
+
+        payload = job.model_dump_json()
         try:
-            await self._get_client().set(
+            client = self._get_client()
+            await client.set(
                 self._key(job.job_id),
-                job.model_dump_json(),
+                payload,
                 ex=settings.redis.job_ttl_seconds,
             )
+            # Push the new state to any SSE watchers of this job.
+            await client.publish(self._event_channel(job.job_id), payload)
         except (RedisTimeoutError, RedisConnectionError, RedisError):
             raise self._redis_unavailable()
 
     async def _read_job(self, job_id: str) -> Optional[JobData]:
+        if not settings.redis.enabled:
+            job = self._jobs.get(job_id)
+            return job.model_copy(deep=True) if job else None
+
         try:
             raw_value = await self._get_client().get(self._key(job_id))
         except (RedisTimeoutError, RedisConnectionError, RedisError):
@@ -81,57 +141,193 @@ class StatusTracker:
 
     async def create_job(self, job_id: str) -> JobData:
         """Initialize a new job tracker"""
+        if not settings.redis.enabled:
+            self._creates_since_eviction += 1
+            if self._creates_since_eviction >= self._EVICTION_INTERVAL:
+                self._creates_since_eviction = 0
+                self._evict_stale_jobs()
+
         job = JobData(job_id=job_id)
         await self._write_job(job)
         return job
 
+    def update_status_background(self, job_id: str, status: JobStatus, message: str = None, progress: int = None) -> None:
+        """
+        Fire-and-forget variant of update_status for intermediate progress
+        waypoints, so hot paths do not wait out a store round-trip per
+        update. Failures are swallowed -- a dropped waypoint is harmless --
+        and terminal states must still go through the awaited setters.
+        """
+        task = asyncio.create_task(self.update_status(job_id, status, message, progress))
+        task.add_done_callback(lambda t: t.exception())
+
     async def update_status(self, job_id: str, status: JobStatus, message: str = None, progress: int = None):
         """Update the state of a job"""
-        job = await self._read_job(job_id)
-        if not job:
-            return
+        async with self._job_lock(job_id):
+            job = await self._read_job(job_id)
+            if not job:
+                return
 
-        job.status = status
-        job.updated_at = datetime.utcnow()
+            # A background waypoint may land after set_result/set_error has
+            # already run; never regress a finished job.
+            if job.status in self._TERMINAL_STATUSES:
+                return
 
-        if message:
-            job.message = message
-        if progress is not None:
-            job.progress = progress
+            job.status = status
+            job.updated_at = datetime.now(timezone.utc)
 
-        await self._write_job(job)
+            if message:
+                job.message = message
+            if progress is not None:
+                job.progress = progress
+
+            await self._write_job(job)
 
     async def set_result(self, job_id: str, result: Dict[str, Any]):
         """Store the final result (e.g., pandas profile summary)"""
-        job = await self._read_job(job_id)
-        if not job:
-            return
+        async with self._job_lock(job_id):
+            job = await self._read_job(job_id)
+            if not job:
+                return
 
-        job.result = result
-        job.status = JobStatus.COMPLETED
-        job.progress = 100
-        job.message = "Processing complete"
-        job.updated_at = datetime.utcnow()
-        await self._write_job(job)
+            job.result = result
+            job.status = JobStatus.COMPLETED
+            job.progress = 100
+            job.message = "Processing complete"
+            job.updated_at = datetime.now(timezone.utc)
+            await self._write_job(job)
 
     async def set_error(self, job_id: str, error_message: str):
         """Mark job as failed"""
-        job = await self._read_job(job_id)
-        if not job:
-            return
+        async with self._job_lock(job_id):
+            job = await self._read_job(job_id)
+            if not job:
+                return
 
-        job.error = error_message
-        job.status = JobStatus.FAILED
-        job.message = "Processing failed"
-        job.updated_at = datetime.utcnow()
-        await self._write_job(job)
+            job.error = error_message
+            job.status = JobStatus.FAILED
+            job.message = "Processing failed"
+            job.updated_at = datetime.now(timezone.utc)
+            await self._write_job(job)
 
     async def get_status(self, job_id: str) -> Optional[JobData]:
         """Get current status for polling"""
         return await self._read_job(job_id)
 
+    async def get_status_json(self, job_id: str) -> Optional[str]:
+        """
+        Get the serialized status for polling endpoints. Redis already stores
+        the JSON blob, so this avoids deserializing and re-encoding the
+        (potentially large) result payload on every poll.
+        """
+        if not settings.redis.enabled:
+            job = self._jobs.get(job_id)
+            return job.model_dump_json() if job else None
+
+        try:
+            return await self._get_client().get(self._key(job_id))
+        except (RedisTimeoutError, RedisConnectionError, RedisError):
+            raise self._redis_unavailable()
+
+    def _code_key(self, cache_key: str) -> str:
+        return f"{settings.redis.job_key_prefix}code:{cache_key}"
+
+    async def get_cached_code(self, cache_key: str) -> Optional[str]:
+        """
+        Look up previously generated code by its (schema, question) hash.
+        Best-effort: a store failure reads as a miss rather than failing
+        the job, since the caller can always regenerate.
+        """
+        if not settings.redis.enabled:
+            return self._code_cache.get(cache_key)
+
+        try:
+            return await self._get_client().get(self._code_key(cache_key))
+        except (RedisTimeoutError, RedisConnectionError, RedisError):
+            return None
+
+    async def set_cached_code(self, cache_key: str, code: str) -> None:
+        """Store generated code under its hash; best-effort like the lookup."""
+        if not settings.redis.enabled:
+            # Crude bound for the in-process store: drop the oldest entry
+            # (dicts preserve insertion order) once the cap is reached.
+            while len(self._code_cache) >= self._MAX_CACHED_CODE:
+                self._code_cache.pop(next(iter(self._code_cache)))
+            self._code_cache[cache_key] = code
+            return
+
+        try:
+            await self._get_client().set(
+                self._code_key(cache_key),
+                code,
+                ex=settings.redis.job_ttl_seconds,
+            )
+        except (RedisTimeoutError, RedisConnectionError, RedisError):
+            pass
+
+    _TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def _is_terminal(self, payload: str) -> bool:
+        return JobData.model_validate_json(payload).status in self._TERMINAL_STATUSES
+
+    async def watch_job(self, job_id: str) -> AsyncIterator[str]:
+        """
+        Yield serialized job states: the current one first, then each update
+        as it happens, ending once the job completes or fails. Backs the SSE
+        stream endpoints so clients need not poll.
+        """
+        if not settings.redis.enabled:
+            queue: asyncio.Queue = asyncio.Queue()
+            self._local_subscribers.setdefault(job_id, []).append(queue)
+            try:
+                current = await self.get_status_json(job_id)
+                if current:
+                    yield current
+                    if self._is_terminal(current):
+                        return
+                while True:
+                    payload = await queue.get()
+                    yield payload
+                    if self._is_terminal(payload):
+                        return
+            finally:
+                subscribers = self._local_subscribers.get(job_id, [])
+                if queue in subscribers:
+                    subscribers.remove(queue)
+                if not subscribers:
+                    self._local_subscribers.pop(job_id, None)
+            return
+
+        pubsub = self._get_client().pubsub()
+        try:
+            # Subscribe before snapshotting so no update can slip between.
+            await pubsub.subscribe(self._event_channel(job_id))
+            current = await self.get_status_json(job_id)
+            if current:
+                yield current
+                if self._is_terminal(current):
+                    return
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                payload = message["data"]
+                yield payload
+                if self._is_terminal(payload):
+                    return
+        except (RedisTimeoutError, RedisConnectionError, RedisError):
+            raise self._redis_unavailable()
+        finally:
+            try:
+                await pubsub.unsubscribe(self._event_channel(job_id))
+                await pubsub.aclose()
+            except (RedisTimeoutError, RedisConnectionError, RedisError):
+                pass
+
     async def list_active_jobs(self) -> List[JobData]:
         """List all jobs (for admin/debug)"""
+        if not settings.redis.enabled:
+            return [job.model_copy(deep=True) for job in self._jobs.values()]
+
         try:
             keys = []
             async for key in self._get_client().scan_iter(match=f"{settings.redis.job_key_prefix}*"):
@@ -1,13 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from config.settings import settings
 from router import chat, file_upload
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create storage directories once at startup instead of stat'ing and
+    # re-creating them on every upload.
+    file_upload.prepare_tmp_processed_dir()
+    yield
+
+
 # Suggestion: Use your settings to configure the app title/version!
 app = FastAPI(
     title=settings.api.title,
     version=settings.api.version,
     description=settings.api.description,
+    lifespan=lifespan,
+    # orjson encodes large payloads (e.g. column profiles) several times
+    # faster than the stdlib json encoder.
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
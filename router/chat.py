@@ -1,5 +1,6 @@
 import uuid
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Response
+from fastapi.responses import StreamingResponse
 from schemas.chat import ChatRequest, ChatJobResponse
 from services.ai_analyst import AIAnalyst
 from core.status_tracker import tracker
@@ -40,7 +41,22 @@ async def get_chat_status(job_id: str):
     """
     Reusing the generic tracker to check chat status.
     """
-    status = await tracker.get_status(job_id)
-    if not status:
+    status_json = await tracker.get_status_json(job_id)
+    if not status_json:
         raise HTTPException(status_code=404, detail="Job not found")
-    return status
\ No newline at end of file
+    # Serve the stored JSON blob directly; no decode/re-encode per poll.
+    return Response(content=status_json, media_type="application/json")
+
+@router.get("/status/{job_id}/stream")
+async def stream_chat_status(job_id: str):
+    """
+    Push chat job status over Server-Sent Events until the job finishes.
+    """
+    if await tracker.get_status_json(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for state in tracker.watch_job(job_id):
+            yield f"data: {state}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
\ No newline at end of file
@@ -1,9 +1,15 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from tempfile import gettempdir
 from time import time
+from typing import Any, Dict, List, Tuple
 import uuid
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Response, UploadFile
+from fastapi.responses import StreamingResponse
 
 from config.settings import get_settings
 from core.data_processor import DataProcessor
@@ -20,7 +26,60 @@ TMP_FILE_TTL_SECONDS = 60 * 60  # 1 hour
 TMP_MAX_PROCESSED_FILES = 128
 
 
-def _prepare_tmp_processed_dir() -> None:
+# Pool for the CPU-bound pandas work so it cannot stall the event loop;
+# created lazily on the first upload.
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _process_pool
+
+
+def _process_dataframe(
+    file_bytes: bytes,
+    file_type: SupportedFileType,
+    processed_path: str,
+) -> Tuple[Dict[str, Any], List[str], int]:
+    """
+    CPU-bound part of upload processing (parse, clean, profile, persist).
+    Runs inside a worker process.
+    """
+    try:
+        df = read_tabular_data(file_bytes, file_type=file_type)
+        processor = DataProcessor()
+        cleaned_df = processor.clean_data(df)
+        profile = processor.generate_profile(cleaned_df)
+        # zstd compresses better than the default snappy and decodes quickly;
+        # bounded row groups let later reads parallelize and skip data, and
+        # explicit column statistics keep the analyst's predicate pushdown
+        # working. Dictionary encoding of strings is the pyarrow default.
+        cleaned_df.to_parquet(
+            processed_path,
+            engine="pyarrow",
+            compression="zstd",
+            compression_level=3,
+            row_group_size=262144,
+            write_statistics=True,
+            data_page_size=1 << 20,
+        )
+        # Stash describe() output beside the parquet so the analyst can hand
+        # summary statistics to generated code without rescanning the frame
+        # on every question. default=str covers Timestamps and similar.
+        stats = cleaned_df.describe(include="all").to_dict()
+        Path(processed_path).with_suffix(".stats.json").write_text(
+            json.dumps(stats, default=str)
+        )
+        return profile, list(cleaned_df.columns), len(cleaned_df)
+    except HTTPException as exc:
+        # HTTPException does not survive pickling back to the parent process.
+        raise RuntimeError(str(exc.detail)) from exc
+
+
+def prepare_tmp_processed_dir() -> None:
+    """Create the processed-file directory; called once at app startup."""
     TMP_PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
 
@@ -108,12 +167,31 @@ async def get_upload_status(file_id: str):
     """
     Check the processing status of an uploaded file via the Tracker
     """
-    job = await tracker.get_status(file_id)
+    job_json = await tracker.get_status_json(file_id)
+
+    if not job_json:
+        raise HTTPException(status_code=404, detail="File processing job not found")
+
+    # The tracker stores serialized JSON; return it as-is instead of
+    # decoding and re-encoding the payload on every poll.
+    return Response(content=job_json, media_type="application/json")
 
-    if not job:
+
+@router.get("/status/{file_id}/stream")
+async def stream_upload_status(file_id: str):
+    """
+    Push processing status over Server-Sent Events; the stream closes once
+    the job completes or fails. The polling endpoint above remains for
+    clients that cannot consume SSE.
+    """
+    if await tracker.get_status_json(file_id) is None:
         raise HTTPException(status_code=404, detail="File processing job not found")
 
-    return job
+    async def event_stream():
+        async for state in tracker.watch_job(file_id):
+            yield f"data: {state}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
 async def process_uploaded_file(
@@ -128,28 +206,27 @@ async def process_uploaded_file(
     processed_path: Path | None = None
 
     try:
-        processor = DataProcessor()
-
-        await tracker.update_status(file_id, JobStatus.PROCESSING, "Loading data...", 10)
-        df = read_tabular_data(file_bytes, file_type=file_type)
-
-        await tracker.update_status(file_id, JobStatus.PROCESSING, "Cleaning data...", 30)
-        cleaned_df = processor.clean_data(df)
-
-        await tracker.update_status(file_id, JobStatus.PROCESSING, "Generating profile...", 60)
-        profile = processor.generate_profile(cleaned_df)
-
-        await tracker.update_status(file_id, JobStatus.PROCESSING, "Saving results...", 90)
-        _prepare_tmp_processed_dir()
+        tracker.update_status_background(file_id, JobStatus.PROCESSING, "Processing data...", 20)
         _cleanup_tmp_processed_files()
         processed_path = TMP_PROCESSED_DIR / f"{file_id}.parquet"
-        cleaned_df.to_parquet(processed_path)
 
+        # Parse/clean/profile are CPU-bound pandas calls; run them in a
+        # worker process so the event loop keeps serving status polls.
+        loop = asyncio.get_running_loop()
+        profile, columns, rows = await loop.run_in_executor(
+            _get_process_pool(),
+            _process_dataframe,
+            file_bytes,
+            file_type,
+            str(processed_path),
+        )
+
+        tracker.update_status_background(file_id, JobStatus.PROCESSING, "Saving results...", 90)
         result_data = {
             "processed_path": str(processed_path),
             "profile": profile,
-            "columns": list(cleaned_df.columns),
-            "rows": len(cleaned_df),
+            "columns": columns,
+            "rows": rows,
             "file_type": file_type,
             "filename": original_filename,
         }
@@ -158,4 +235,5 @@ async def process_uploaded_file(
     except Exception as exc:
         if processed_path and processed_path.exists():
             processed_path.unlink(missing_ok=True)
+            processed_path.with_suffix(".stats.json").unlink(missing_ok=True)
         await tracker.set_error(file_id, str(exc))
@@ -1,17 +1,29 @@
 import ast
 import asyncio
 import builtins
+import functools
+import hashlib
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from tempfile import gettempdir
 import numpy as np
+import orjson
 import pandas as pd
 import plotly.express as px
+import pyarrow.parquet as pq
 from groq import Groq
+
+try:
+    import duckdb
+except ImportError:
+    # DuckDB is an optional accelerator for generated aggregation code.
+    duckdb = None
 from core.status_tracker import tracker, JobStatus
 from schemas.chat import ChatResult
 from config.settings import settings
+from services import fast_kernels
 
 SAFE_BUILTINS = {
     "abs": builtins.abs,
@@ -37,6 +49,235 @@ SAFE_BUILTINS = {
     "zip": builtins.zip,
 }
 
+# One globals dict shared by every exec invocation. Generated code cannot
+# rebind these names: plain assignments land in the per-call locals dict,
+# and the ``global`` statement is rejected by the validator.
+_EXEC_GLOBALS = {
+    "__builtins__": SAFE_BUILTINS,
+    "pd": pd,
+    "np": np,
+    "px": px,
+    "json": json,
+    "fast": fast_kernels,
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_snippet(source: str):
+    """
+    Bytecode-compile a validated snippet, memoized so repeated identical
+    LLM outputs skip the parse/compile phase.
+    """
+    return compile(source, "<generated>", "exec")
+
+
+def _diet(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Downcast columns to the narrowest dtype that holds their values, so
+    cached frames are smaller and memory-bound operations (groupby, sum,
+    serialization) touch fewer bytes. Runs once per cache fill, never per
+    question; the frame is freshly decoded here, so mutating in place is
+    safe.
+    """
+    for col in df.select_dtypes(include=["integer"]).columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    for col in df.select_dtypes(include=["floating"]).columns:
+        df[col] = pd.to_numeric(df[col], downcast="float")
+    if len(df) > 0:
+        for col in df.select_dtypes(include=["object", "string"]).columns:
+            if df[col].nunique() / len(df) < 0.5:
+                df[col] = df[col].astype("category")
+    return df
+
+
+@functools.lru_cache(maxsize=32)
+def _load_cached_df(
+    file_path: str,
+    mtime: float,
+    columns: tuple[str, ...] | None = None,
+    filters: tuple | None = None,
+) -> pd.DataFrame:
+    """
+    Load a processed parquet file, memoized per (path, mtime, columns,
+    filters) so repeat questions about the same file skip the parquet decode
+    entirely. The mtime in the key invalidates the entry when the file is
+    rewritten; a columns tuple limits decoding to the column chunks actually
+    needed, and filters let pyarrow skip row groups via their statistics.
+
+    Reading through pyarrow directly memory-maps the file, decodes row
+    groups on all cores, and hands the buffers to pandas without an extra
+    copy (self_destruct releases each Arrow column as it is converted).
+    """
+    table = pq.read_table(
+        file_path,
+        columns=list(columns) if columns is not None else None,
+        filters=list(filters) if filters is not None else None,
+        memory_map=True,
+        use_threads=True,
+    )
+    return _diet(table.to_pandas(self_destruct=True, split_blocks=True))
+
+
+@functools.lru_cache(maxsize=64)
+def _schema_context(file_path: str, mtime: float) -> tuple[tuple[str, ...], str, str]:
+    """
+    Column names, prompt schema listing and 3-row head sample for a processed
+    file, cached per (path, mtime) so repeat questions skip the footer read
+    and sample decode entirely.
+    """
+    parquet_file = pq.ParquetFile(file_path)
+    schema = parquet_file.schema_arrow
+    schema_str = "\n".join(
+        f"- {name} ({dtype})" for name, dtype in zip(schema.names, schema.types)
+    )
+    first_batch = next(parquet_file.iter_batches(batch_size=3), None)
+    sample_str = (
+        first_batch.to_pandas().to_csv(index=False).strip()
+        if first_batch is not None
+        else ""
+    )
+    return tuple(schema.names), schema_str, sample_str
+
+
+def _make_sql_runner(df: pd.DataFrame):
+    """
+    Build the sql(query) helper handed to generated code. Queries run on
+    DuckDB's vectorized multithreaded engine against the frame (visible as
+    table 'df') and come back as a pandas DataFrame -- typically far faster
+    than equivalent pandas aggregations, and with external file/extension
+    access disabled.
+    """
+    def sql(query: str) -> pd.DataFrame:
+        con = duckdb.connect(config={"enable_external_access": False})
+        try:
+            con.register("df", df)
+            return con.execute(str(query)).df()
+        finally:
+            con.close()
+    return sql
+
+
+def _coerce_to_dataframe(value: object) -> pd.DataFrame:
+    if isinstance(value, pd.DataFrame):
+        return value
+    if isinstance(value, pd.Series):
+        name = value.name if value.name is not None else "value"
+        return value.to_frame(name=name)
+    if isinstance(value, dict):
+        try:
+            return pd.DataFrame(value)
+        except ValueError:
+            return pd.DataFrame([value])
+    if isinstance(value, list):
+        return pd.DataFrame(value)
+    if np.isscalar(value):
+        return pd.DataFrame([{"value": value}])
+    try:
+        return pd.DataFrame(value)
+    except Exception as exc:
+        raise ValueError("result_table must be convertible to a pandas DataFrame.") from exc
+
+
+def _normalize_chart_payload(chart_value: object) -> dict | None:
+    if chart_value is None:
+        return None
+
+    if isinstance(chart_value, dict):
+        return chart_value
+
+    if isinstance(chart_value, str):
+        stripped_chart = chart_value.strip()
+        if not stripped_chart:
+            return None
+        try:
+            parsed = json.loads(stripped_chart)
+        except json.JSONDecodeError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+    if hasattr(chart_value, "to_json"):
+        try:
+            parsed = json.loads(chart_value.to_json())
+        except Exception:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+    return None
+
+
+def _run_snippet(
+    file_path: str,
+    mtime: float,
+    code: str,
+    columns: tuple[str, ...] | None,
+    filters: tuple | None,
+) -> tuple[list | None, dict | None, str | None]:
+    """
+    Execute a validated snippet against the file and return
+    (records, chart_payload, execution_error). Runs inside a pool worker so
+    CPU-heavy generated code holds a worker's GIL, not the server's; each
+    worker keeps its own _load_cached_df and _compile_snippet caches (warm
+    after the first question on a file).
+    """
+    if filters is not None:
+        try:
+            df = _load_cached_df(file_path, mtime, columns, filters)
+        except Exception:
+            # A pushed-down literal may have no comparison kernel against the
+            # column's arrow type (e.g. an ISO string versus timestamp[us],
+            # which the LLM emits because the sample rows show strings).
+            # Pushdown is only an optimization -- the snippet re-applies the
+            # same mask in pandas, which coerces -- so load unfiltered.
+            df = _load_cached_df(file_path, mtime, columns, None)
+    else:
+        df = _load_cached_df(file_path, mtime, columns, None)
+
+    # Generated code freely mutates 'df' in place (added columns, inplace
+    # drops); hand it a copy so the cached frame stays pristine for later
+    # questions keyed to the same entry.
+    df = df.copy()
+    local_vars = {"df": df}
+    if duckdb is not None:
+        local_vars["sql"] = _make_sql_runner(df)
+
+    # Summary statistics precomputed at upload time; snippets can read
+    # these instead of rescanning the frame with df.describe().
+    stats_path = Path(file_path).with_suffix(".stats.json")
+    if stats_path.exists():
+        local_vars["df_describe"] = json.loads(stats_path.read_text())
+
+    execution_error = None
+    try:
+        exec(_compile_snippet(code), _EXEC_GLOBALS, local_vars)
+    except Exception as code_error:
+        execution_error = str(code_error)
+
+    result_table = local_vars.get("result_table")
+    if result_table is None:
+        return None, None, execution_error
+
+    # Serialize through pandas' C JSON writer and orjson's parser instead of
+    # to_dict: no per-cell Python boxing, timestamps come out ISO-formatted,
+    # NaN becomes null, and the records pickle cheaply back to the parent.
+    records = orjson.loads(
+        _coerce_to_dataframe(result_table).to_json(orient="records", date_format="iso")
+    )
+    chart_payload = _normalize_chart_payload(local_vars.get("result_chart"))
+    return records, chart_payload, execution_error
+
+
+# Pool for executing generated snippets; created lazily like the upload
+# router's processing pool.
+_exec_pool: ProcessPoolExecutor | None = None
+
+
+def _get_exec_pool() -> ProcessPoolExecutor:
+    global _exec_pool
+    if _exec_pool is None:
+        _exec_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _exec_pool
+
+
 class AIAnalyst:
     SAFE_IMPORT_LINES = {
         "import plotly.express as px",
@@ -96,6 +337,254 @@ class AIAnalyst:
     def _get_file_path(self, file_id: str) -> str:
         return str(self.processed_dir / f"{file_id}.parquet")
 
+    _STREAM_PROGRESS_CHUNKS = 20
+
+    async def _stream_completion(self, job_id: str, prompt: str) -> str:
+        """
+        Stream the model response instead of awaiting the full completion in
+        one call, assembling the code incrementally and emitting coarse
+        progress updates while tokens arrive. Runs the blocking stream
+        iterator in a worker thread.
+        """
+        loop = asyncio.get_running_loop()
+
+        def report_progress(progress: int) -> None:
+            future = asyncio.run_coroutine_threadsafe(
+                tracker.update_status(job_id, JobStatus.PROCESSING, "Consulting AI...", progress),
+                loop,
+            )
+            # Progress updates are best-effort; don't let a failed one leak.
+            future.add_done_callback(lambda f: f.exception())
+
+        def consume() -> str:
+            stream = self.client.chat.completions.create(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are a Python data analyst assistant that writes clean, efficient pandas code."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                model="openai/gpt-oss-120b",  # Or "llama3-70b-8192", "llama3-8b-8192", "gemma2-9b-it"
+                temperature=0.1,
+                max_tokens=1000,
+                stream=True,
+            )
+            pieces = []
+            for index, chunk in enumerate(stream):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    pieces.append(chunk.choices[0].delta.content)
+                if index > 0 and index % self._STREAM_PROGRESS_CHUNKS == 0:
+                    report_progress(min(55, 35 + 5 * (index // self._STREAM_PROGRESS_CHUNKS)))
+            return "".join(pieces)
+
+        return await asyncio.to_thread(consume)
+
+    @staticmethod
+    def _references_sql_helper(tree: ast.AST) -> bool:
+        """
+        Whether the snippet uses the sql() helper. DuckDB queries read the
+        loaded frame wholesale, invisibly to the df-reference analyses, so
+        projection and filter pushdown must stand down when sql is in play.
+        """
+        return any(
+            isinstance(node, ast.Name) and node.id == "sql" for node in ast.walk(tree)
+        )
+
+    def _referenced_columns(self, code: str, column_names: list) -> tuple[str, ...] | None:
+        """
+        Determine which columns the generated code reads so the parquet load
+        can skip the rest. Every use of ``df`` must be a direct column access
+        (df['col'], df.col or df[['a', 'b']]); any other use -- method calls,
+        boolean masks, passing df to px -- may need columns the code never
+        names, so the whole table is loaded (None).
+        """
+        try:
+            tree = ast.parse(code, mode="exec")
+        except SyntaxError:
+            return None
+
+        # sql() queries name columns in SQL text, invisible to this walk;
+        # projecting by the Python accesses alone would drop columns the
+        # query needs.
+        if self._references_sql_helper(tree):
+            return None
+
+        parents = {
+            child: parent
+            for parent in ast.walk(tree)
+            for child in ast.iter_child_nodes(parent)
+        }
+        known = set(column_names)
+        referenced = set()
+
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Name) and node.id == "df"):
+                continue
+            parent = parents.get(node)
+
+            if isinstance(parent, ast.Subscript) and parent.value is node:
+                index = parent.slice
+                if (
+                    isinstance(index, ast.Constant)
+                    and isinstance(index.value, str)
+                    and index.value in known
+                ):
+                    referenced.add(index.value)
+                    continue
+                if isinstance(index, (ast.List, ast.Tuple)) and all(
+                    isinstance(element, ast.Constant)
+                    and isinstance(element.value, str)
+                    and element.value in known
+                    for element in index.elts
+                ):
+                    referenced.update(element.value for element in index.elts)
+                    continue
+                return None
+
+            if isinstance(parent, ast.Attribute) and parent.value is node and parent.attr in known:
+                referenced.add(parent.attr)
+                continue
+
+            return None
+
+        if not referenced or len(referenced) == len(column_names):
+            return None
+
+        # Keep schema order so the cache key is stable.
+        return tuple(name for name in column_names if name in referenced)
+
+    # No ast.NotEq here: pyarrow's '!=' filter drops null rows (SQL ternary
+    # logic) while the pandas mask the snippet re-applies keeps them, so a
+    # pushed-down != silently changes results on columns with missing values.
+    _PUSHDOWN_OPS = {
+        ast.Eq: "==",
+        ast.Lt: "<",
+        ast.LtE: "<=",
+        ast.Gt: ">",
+        ast.GtE: ">=",
+    }
+
+    def _pushdown_filters(self, code: str, column_names: list) -> tuple | None:
+        """
+        Translate a simple df[df['col'] == literal] style mask into parquet
+        read filters so row groups failing their min/max statistics are never
+        decoded. Only applied when every use of ``df`` belongs to one such
+        filter expression and the mask is a pure conjunction of literal
+        comparisons (or .isin of literals) -- the generated code then
+        re-applies the same mask in pandas, which is idempotent on the
+        pre-filtered rows.
+        """
+        try:
+            tree = ast.parse(code, mode="exec")
+        except SyntaxError:
+            return None
+
+        # The sql() helper queries the loaded frame as DuckDB table 'df',
+        # so any sql use reads rows this analysis never sees; pre-filtering
+        # would silently change its results.
+        if self._references_sql_helper(tree):
+            return None
+
+        known = set(column_names)
+
+        def column_of(node) -> str | None:
+            if (
+                isinstance(node, ast.Subscript)
+                and isinstance(node.value, ast.Name)
+                and node.value.id == "df"
+                and isinstance(node.slice, ast.Constant)
+                and isinstance(node.slice.value, str)
+                and node.slice.value in known
+            ):
+                return node.slice.value
+            return None
+
+        def parse_predicate(node) -> tuple | None:
+            if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitAnd):
+                left = parse_predicate(node.left)
+                right = parse_predicate(node.right)
+                if left is None or right is None:
+                    return None
+                return left + right
+            if isinstance(node, ast.Compare) and len(node.ops) == 1:
+                column = column_of(node.left)
+                operator = self._PUSHDOWN_OPS.get(type(node.ops[0]))
+                literal = node.comparators[0]
+                if (
+                    column is not None
+                    and operator is not None
+                    and isinstance(literal, ast.Constant)
+                    and isinstance(literal.value, (bool, int, float, str))
+                ):
+                    return ((column, operator, literal.value),)
+                return None
+            if (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr == "isin"
+                and len(node.args) == 1
+                and not node.keywords
+                and isinstance(node.args[0], (ast.List, ast.Tuple, ast.Set))
+                and all(isinstance(element, ast.Constant) for element in node.args[0].elts)
+            ):
+                column = column_of(node.func.value)
+                if column is not None:
+                    values = tuple(element.value for element in node.args[0].elts)
+                    return ((column, "in", values),)
+                return None
+            return None
+
+        covered = set()
+        predicates = set()
+        for node in ast.walk(tree):
+            if not (
+                isinstance(node, ast.Subscript)
+                and isinstance(node.value, ast.Name)
+                and node.value.id == "df"
+            ):
+                continue
+            predicate = parse_predicate(node.slice)
+            if predicate is None:
+                continue
+            predicates.add(predicate)
+            covered.update(
+                name for name in ast.walk(node)
+                if isinstance(name, ast.Name) and name.id == "df"
+            )
+
+        if len(predicates) != 1:
+            return None
+        all_df_uses = {
+            name for name in ast.walk(tree)
+            if isinstance(name, ast.Name) and name.id == "df"
+        }
+        if all_df_uses != covered:
+            return None
+        return next(iter(predicates))
+
+    _ROWWISE_ATTRS = {"apply", "applymap", "iterrows", "itertuples"}
+
+    def _uses_rowwise_pandas(self, code: str) -> bool:
+        """
+        Detect per-row Python dispatch (.apply and friends) in generated
+        code. These run the interpreter once per row -- 10-100x slower than
+        the vectorized equivalent -- and .apply(lambda ...) would be
+        rejected by the validator anyway, so catching it here buys a chance
+        to re-prompt instead of failing the job.
+        """
+        try:
+            tree = ast.parse(code, mode="exec")
+        except SyntaxError:
+            return False
+        return any(
+            isinstance(node, ast.Attribute) and node.attr in self._ROWWISE_ATTRS
+            for node in ast.walk(tree)
+        )
+
     def _get_call_name(self, node: ast.AST) -> str | None:
         if isinstance(node, ast.Name):
             return node.id
@@ -155,52 +644,6 @@ class AIAnalyst:
         if not has_result_table_assignment:
             raise ValueError("Generated code must assign the final value to a 'result_table' variable.")
 
-    def _coerce_to_dataframe(self, value: object) -> pd.DataFrame:
-        if isinstance(value, pd.DataFrame):
-            return value
-        if isinstance(value, pd.Series):
-            name = value.name if value.name is not None else "value"
-            return value.to_frame(name=name)
-        if isinstance(value, dict):
-            try:
-                return pd.DataFrame(value)
-            except ValueError:
-                return pd.DataFrame([value])
-        if isinstance(value, list):
-            return pd.DataFrame(value)
-        if np.isscalar(value):
-            return pd.DataFrame([{"value": value}])
-        try:
-            return pd.DataFrame(value)
-        except Exception as exc:
-            raise ValueError("result_table must be convertible to a pandas DataFrame.") from exc
-
-    def _normalize_chart_payload(self, chart_value: object) -> dict | None:
-        if chart_value is None:
-            return None
-
-        if isinstance(chart_value, dict):
-            return chart_value
-
-        if isinstance(chart_value, str):
-            stripped_chart = chart_value.strip()
-            if not stripped_chart:
-                return None
-            try:
-                parsed = json.loads(stripped_chart)
-            except json.JSONDecodeError:
-                return None
-            return parsed if isinstance(parsed, dict) else None
-
-        if hasattr(chart_value, "to_json"):
-            try:
-                parsed = json.loads(chart_value.to_json())
-            except Exception:
-                return None
-            return parsed if isinstance(parsed, dict) else None
-
-        return None
-
     async def analyze_background(self, job_id: str, file_id: str, question: str):
         """
         The main loop: Load -> Think -> Code -> Execute -> Save
@@ -210,32 +653,65 @@ class AIAnalyst:
                 raise RuntimeError("AI provider is not configured on the server.")
 
             # 1. Start
-            await tracker.update_status(job_id, JobStatus.PROCESSING, "Loading data...", 10)
+            tracker.update_status_background(job_id, JobStatus.PROCESSING, "Loading data...", 10)
             file_path = self._get_file_path(file_id)
             
-            if not os.path.exists(file_path):
-                raise FileNotFoundError("File not found. Please upload again.")
-                
-            # Load Data
-            df = pd.read_parquet(file_path)
-            
-            # 2. Ask Grok
-            await tracker.update_status(job_id, JobStatus.PROCESSING, "Consulting AI...", 30)
-            
-            # Prepare schema summary for the AI
-            columns_summary = []
-            for col, dtype in df.dtypes.items():
-                columns_summary.append(f"- {col} ({dtype})")
-            schema_str = "\n".join(columns_summary)
-            
+            # A single stat both checks existence and keys the caches;
+            # no separate os.path.exists round-trip.
+            try:
+                mtime = os.path.getmtime(file_path)
+            except FileNotFoundError:
+                raise FileNotFoundError("File not found. Please upload again.") from None
+
+            # Schema and head sample come from the parquet footer and first
+            # batch (cached per file version); the full table is only decoded
+            # once we know which columns the generated code actually touches.
+            column_names, schema_str, sample_str = await asyncio.to_thread(
+                _schema_context, file_path, mtime
+            )
+
+            # 2. Ask Grok -- unless the same schema+question pair has already
+            # produced working code; the LLM round-trip dominates job latency,
+            # and identical inputs yield the same snippet. A schema change
+            # changes the key, so stale code cannot be replayed.
+            code_cache_key = hashlib.blake2b(
+                (schema_str + "\n" + question).encode(), digest_size=16
+            ).hexdigest()
+            cached_code = await tracker.get_cached_code(code_cache_key)
+
+            tracker.update_status_background(job_id, JobStatus.PROCESSING, "Consulting AI...", 30)
+
+            sql_hint = (
+                "\n            A helper sql(query) runs a DuckDB SQL query against the table 'df'"
+                "\n            and returns a pandas DataFrame. Prefer it for aggregations, joins"
+                "\n            and group-bys over equivalent pandas code."
+                if duckdb is not None
+                else ""
+            )
+            fast_hint = (
+                "\n            A helper module 'fast' provides compiled single-column reductions:"
+                "\n            fast.nanmean(df['col']), fast.nansum(df['col']) and"
+                "\n            fast.groupby_sum(df['k'], df['v']) (returns a 'key'/'sum' DataFrame)."
+                "\n            Prefer them over .apply or row-wise code for those cases."
+            )
+            describe_hint = (
+                "\n            A dict 'df_describe' holds precomputed df.describe(include='all')"
+                "\n            output keyed by column; prefer it over calling df.describe()."
+                if os.path.exists(str(Path(file_path).with_suffix(".stats.json")))
+                else ""
+            )
+
             prompt = f"""
-            You are a Python Data Analyst. 
+            You are a Python Data Analyst.
             You are given a Pandas DataFrame named 'df'.
-            You are also given Plotly Express as 'px'.
-            
+            You are also given Plotly Express as 'px'.{sql_hint}{fast_hint}{describe_hint}
+
             Columns:
             {schema_str}
-            
+
+            Sample rows (CSV):
+            {sample_str}
+
             User Question: {question}
             
             Requirements:
@@ -248,54 +724,61 @@ class AIAnalyst:
             7. Return ONLY python code. Do not use Markdown (```).
             """
             
-            # Call Grok (run in thread to not block asyncio)
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a Python data analyst assistant that writes clean, efficient pandas code."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model="openai/gpt-oss-120b",  # Or "llama3-70b-8192", "llama3-8b-8192", "gemma2-9b-it"
-                temperature=0.1,
-                max_tokens=1000,
-                stream=False
-            )
-            
-            generated_code = response.choices[0].message.content or ""
-            if not generated_code.strip():
-                raise ValueError("AI returned an empty code response.")
-            
-            # 3. Sanitize Code (Remove markdown if Grok adds it)
-            cleaned_code = self._sanitize_generated_code(generated_code)
+            if cached_code is not None:
+                cleaned_code = cached_code
+            else:
+                # Call Grok, streaming tokens as they are generated
+                generated_code = await self._stream_completion(job_id, prompt)
+                if not generated_code.strip():
+                    raise ValueError("AI returned an empty code response.")
+
+                # 3. Sanitize Code (Remove markdown if Grok adds it)
+                cleaned_code = self._sanitize_generated_code(generated_code)
+
+                # Re-prompt once if the model fell back to row-wise pandas;
+                # keep the original response if the retry is no better.
+                if self._uses_rowwise_pandas(cleaned_code):
+                    retry_prompt = prompt + (
+                        "\n            IMPORTANT: Do not use .apply, .applymap, .iterrows or"
+                        "\n            .itertuples. Use vectorized pandas/numpy operations"
+                        "\n            (or the provided helpers) instead."
+                    )
+                    retry_code = self._sanitize_generated_code(
+                        await self._stream_completion(job_id, retry_prompt)
+                    )
+                    if retry_code and not self._uses_rowwise_pandas(retry_code):
+                        cleaned_code = retry_code
+
+            # Cached code was validated before it was stored, but the check is
+            # cheap relative to everything around it; always re-run it.
             self._validate_generated_code(cleaned_code)
-            
-            await tracker.update_status(job_id, JobStatus.PROCESSING, "Executing analysis...", 60)
-            
-            # 4. Secure Execution
-            global_vars = {
-                "__builtins__": SAFE_BUILTINS,
-                "pd": pd,
-                "np": np,
-                "px": px,
-                "json": json,
-            }
-            local_vars = {"df": df}
-            
-            execution_error = None
-            try:
-                exec(cleaned_code, global_vars, local_vars)
-            except Exception as code_error:
-                execution_error = code_error
 
-            # 5. Extract table and chart results (table is required, chart is optional)
-            result_table = local_vars.get("result_table")
-            if result_table is None:
+            tracker.update_status_background(job_id, JobStatus.PROCESSING, "Executing analysis...", 60)
+
+            # Column projection and simple literal filters are derived from
+            # the code here (cheap AST walks); the load itself happens in the
+            # worker so cache entries live next to the exec that uses them.
+            referenced_columns = self._referenced_columns(cleaned_code, column_names)
+            pushdown_filters = None
+            if referenced_columns is None:
+                pushdown_filters = self._pushdown_filters(cleaned_code, column_names)
+
+            # 4. Secure Execution, in a pool worker: concurrent analyses each
+            # hold a worker's GIL instead of serializing on the server's, and
+            # the result comes back as plain records rather than a frame.
+            loop = asyncio.get_running_loop()
+            final_data, chart_payload, execution_error = await loop.run_in_executor(
+                _get_exec_pool(),
+                _run_snippet,
+                file_path,
+                mtime,
+                cleaned_code,
+                referenced_columns,
+                pushdown_filters,
+            )
+
+            # 5. Check the table result (table is required, chart is optional)
+            if final_data is None:
                 raise ValueError(
                     "The AI code did not assign 'result_table'."
                     + (
@@ -305,11 +788,10 @@ class AIAnalyst:
                     )
                 )
 
-            table_df = self._coerce_to_dataframe(result_table)
-            final_data = table_df.to_dict(orient="records")
-
-            result_chart = local_vars.get("result_chart")
-            chart_payload = self._normalize_chart_payload(result_chart)
+            # Only code that executed cleanly and produced a table earns a
+            # cache slot; re-storing a hit just refreshes its TTL.
+            if execution_error is None:
+                await tracker.set_cached_code(code_cache_key, cleaned_code)
 
             if execution_error is not None:
                 chart_payload = None
@@ -321,7 +803,7 @@ class AIAnalyst:
                 else:
                     final_answer_str = "Generated a data table. No chart was returned."
             
-            await tracker.update_status(job_id, JobStatus.PROCESSING, "Finalizing...", 90)
+            tracker.update_status_background(job_id, JobStatus.PROCESSING, "Finalizing...", 90)
 
             # 6. Save Success
             result_payload = ChatResult(
@@ -0,0 +1,94 @@
+"""
+Pre-compiled numeric kernels injected into the generated-code sandbox.
+
+LLM-generated snippets tend to reach for generic pandas aggregations even
+for simple single-column reductions; these helpers give the prompt a fast
+alternative. When numba is installed the inner loops JIT to parallel
+native code the first time they run (and are cached on disk afterwards);
+without it the numpy implementations are used, which are still vectorized
+C. The public functions accept pandas Series or numpy arrays.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # Numba is an optional accelerator; llvmlite pins make it awkward to
+    # require, so the numpy paths below are the supported baseline.
+    njit = None
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _nanmean_native(values):
+        total = 0.0
+        count = 0
+        for i in prange(values.shape[0]):
+            value = values[i]
+            if not np.isnan(value):
+                total += value
+                count += 1
+        return total / count if count > 0 else np.nan
+
+    @njit(parallel=True, cache=True)
+    def _nansum_native(values):
+        total = 0.0
+        for i in prange(values.shape[0]):
+            value = values[i]
+            if not np.isnan(value):
+                total += value
+        return total
+
+    @njit(cache=True)
+    def _groupby_sum_native(codes, values, n_groups):
+        # Serial scatter-add: a parallel version would race on out[code].
+        out = np.zeros(n_groups)
+        for i in range(codes.shape[0]):
+            code = codes[i]
+            if code >= 0 and not np.isnan(values[i]):
+                out[code] += values[i]
+        return out
+
+else:
+    _nanmean_native = None
+    _nansum_native = None
+    _groupby_sum_native = None
+
+
+def _as_float_array(values) -> np.ndarray:
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+
+
+def nanmean(values) -> float:
+    """Mean of a numeric column, ignoring missing values."""
+    array = _as_float_array(values)
+    if _nanmean_native is not None:
+        return float(_nanmean_native(array))
+    return float(np.nanmean(array)) if array.size else float("nan")
+
+
+def nansum(values) -> float:
+    """Sum of a numeric column, ignoring missing values."""
+    array = _as_float_array(values)
+    if _nansum_native is not None:
+        return float(_nansum_native(array))
+    return float(np.nansum(array))
+
+
+def groupby_sum(keys, values) -> pd.DataFrame:
+    """
+    Sum ``values`` per distinct key, returning a two-column DataFrame
+    ('key', 'sum'). Keys are factorized to integer codes first so the hot
+    loop works on ints regardless of the key dtype; missing keys are
+    dropped, matching pandas groupby defaults.
+    """
+    codes, uniques = pd.factorize(pd.Series(keys), use_na_sentinel=True)
+    array = _as_float_array(values)
+    if _groupby_sum_native is not None:
+        sums = _groupby_sum_native(codes.astype(np.int64), array, len(uniques))
+    else:
+        sums = np.zeros(len(uniques))
+        valid = codes >= 0
+        np.add.at(sums, codes[valid], np.nan_to_num(array[valid]))
+    return pd.DataFrame({"key": np.asarray(uniques), "sum": sums})